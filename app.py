@@ -8,10 +8,69 @@ import settings
 import view
 
 
+class Action(Enum):
+    left = 0
+    right = 1
+    down = 2
+    rotate_left = 3
+    rotate_right = 4
+    hard_drop = 5
+    pause = 6
+    restart = 7
+
+
+# input devices are either the keyboard or a joystick, identified by its index
+KEYBOARD = 'keyboard'
+
+# key maps for players sharing the keyboard, assigned in order; the first map is the standard single player layout
+KEY_MAPS = (
+    {
+        pygame.K_LEFT: Action.left,
+        pygame.K_RIGHT: Action.right,
+        pygame.K_DOWN: Action.down,
+        pygame.K_z: Action.rotate_left,
+        pygame.K_UP: Action.rotate_right,
+        pygame.K_x: Action.rotate_right,
+        pygame.K_SPACE: Action.hard_drop,
+        pygame.K_p: Action.pause,
+        pygame.K_RETURN: Action.restart,
+        pygame.K_KP_ENTER: Action.restart,
+    },
+    {
+        pygame.K_a: Action.left,
+        pygame.K_d: Action.right,
+        pygame.K_s: Action.down,
+        pygame.K_q: Action.rotate_left,
+        pygame.K_w: Action.rotate_right,
+        pygame.K_e: Action.rotate_right,
+        pygame.K_LSHIFT: Action.hard_drop,
+        pygame.K_ESCAPE: Action.pause,
+        pygame.K_r: Action.restart,
+    },
+)
+
+# display names for keys where pygame's key name differs from the label on the key
+KEY_NAMES = {
+    pygame.K_RETURN: "Enter",
+    pygame.K_KP_ENTER: "Enter",
+    pygame.K_ESCAPE: "Escape",
+}
+
+# button map for players on a joystick, movement is read from the first hat (d-pad)
+JOYSTICK_BUTTON_MAP = {
+    0: Action.rotate_right,
+    1: Action.rotate_left,
+    2: Action.hard_drop,
+    3: Action.hard_drop,
+    6: Action.restart,
+    7: Action.pause,
+}
+
+
 class InputManager:
     """
     Manages input state related to movement
-    InputManager will receive movement-related keydown and keyup events from the App
+    InputManager will receive movement-related press and release actions from the App
     The PhysicsEngine will use the input state to make decisions about moving the current piece
     """
 
@@ -22,30 +81,30 @@ class InputManager:
         self.c_delta = 0
         self.auto_repeat = False  # flag whether side movements should move at autorepeat speed (or wait for delay)
 
-    def keydown(self, key):
-        if key == pygame.K_LEFT:
+    def keydown(self, action):
+        if action == Action.left:
             self.left_pressed = True
             self.c_delta = -1
-        elif key == pygame.K_RIGHT:
+        elif action == Action.right:
             self.right_pressed = True
             self.c_delta = 1
-        elif key == pygame.K_DOWN:
+        elif action == Action.down:
             self.down_pressed = True
 
-    def keyup(self, key):
-        if key == pygame.K_LEFT:
+    def keyup(self, action):
+        if action == Action.left:
             self.left_pressed = False
             self.c_delta = 0
             self.auto_repeat = False
             if self.right_pressed:
                 self.c_delta = 1
-        elif key == pygame.K_RIGHT:
+        elif action == Action.right:
             self.right_pressed = False
             self.c_delta = 0
             self.auto_repeat = False
             if self.left_pressed:
                 self.c_delta = -1
-        elif key == pygame.K_DOWN:
+        elif action == Action.down:
             self.down_pressed = False
 
 
@@ -58,16 +117,20 @@ class GameState(Enum):
     quit = 5
 
 
-class App:
+class Game:
+    """
+    A single player's game: its own Board, View, PhysicsEngine, InputManager and game state
+    The App owns the event loop and clock, and forwards this game's actions to it
+    """
 
-    def __init__(self):
+    def __init__(self, device, controls, screen=None, sprite_cache=None):
         """
-        Setup objects and initial state. Creates a Clock, Board, View, PhysicsEngine, and InputManager
+        device is KEYBOARD or a joystick index, controls maps the device's key or button codes to Actions
         """
-        pygame.init()
-        self.clock = pygame.time.Clock()
+        self.device = device
+        self.controls = controls
         self.board = model.Board(settings.num_rows + 2, settings.num_cols)  # adding the two hidden rows
-        self.view = view.View(self.board, settings.block_width, settings.hidden_row_fraction)
+        self.view = view.View(self.board, settings.block_width, settings.hidden_row_fraction, screen, sprite_cache)
         self.input_manager = InputManager()
         self.engine = engine.PhysicsEngine(self.board, self.input_manager)
         self.game_state = GameState.initialized
@@ -80,90 +143,232 @@ class App:
         self.engine = engine.PhysicsEngine(self.board, self.input_manager)
         self.game_state = GameState.running
 
+    def step_one_frame(self):
+        """
+        Step the engine forward one frame if the game is running
+        """
+        if self.game_state == GameState.reset:
+            self.reset()
+        try:
+            if self.game_state == GameState.running:
+                self.engine.step_one_frame()
+        except engine.GameOverException:  # TODO: remove
+            self.game_state = GameState.game_over
+
+    def press(self, action):
+        """
+        Process a pressed action
+        Movement related actions are sent to input_manager
+        The engine is called for rotations or hard drop, if the game is not paused
+        Pause is handled by the App, since it applies to all games
+        """
+        if action == Action.restart:
+            if self.game_state == GameState.game_over:
+                self.game_state = GameState.reset
+
+        elif action in [Action.left, Action.right, Action.down]:
+            self.input_manager.keydown(action)  # forward movement events
+
+        # only handle following events if game is not paused
+        if self.game_state != GameState.running:
+            return
+
+        try:
+            if action == Action.hard_drop:
+                self.engine.hard_drop()
+
+            elif action == Action.rotate_right:
+                self.engine.rotate_right()
+            elif action == Action.rotate_left:
+                self.engine.rotate_left()
+        except engine.GameOverException:  # TODO: remove
+            self.game_state = GameState.game_over
+
+    def release(self, action):
+        self.input_manager.keyup(action)
+
+    def update_display(self):
+        """
+        Draw all elements of the game.
+        """
+        self.view.draw_board()
+        if settings.show_metrics:
+            self.view.display_metrics_overlay()
+        if self.game_state == GameState.game_over:
+            self.view.display_game_over_dialog(self.get_control_name(Action.restart))
+        if self.game_state == GameState.paused:
+            self.view.display_pause_dialog(self.get_control_name(Action.pause))
+
+    def get_control_name(self, action):
+        """
+        Return a display name for the first key or button in controls that is mapped to action
+        Pause applies to all games, so if this game has no pause control the first key map's is used
+        """
+        controls = self.controls
+        if action == Action.pause and action not in controls.values():
+            controls = KEY_MAPS[0]
+        code = next(code for code, mapped_action in controls.items() if mapped_action == action)
+        if controls is JOYSTICK_BUTTON_MAP:
+            return "button {}".format(code)
+        return KEY_NAMES.get(code, pygame.key.name(code).upper())
+
+
+class App:
+
+    def __init__(self, num_players=1):
+        """
+        Setup objects and initial state. Creates a Clock and one Game per player
+        With more than one player, the boards are laid out side by side in a single window and share
+        one background and sprite cache. Players are given the keyboard maps in KEY_MAPS first,
+        then one joystick each
+        Raises ValueError if num_players is less than one or there are not enough joysticks
+        """
+        pygame.init()
+        num_joysticks = pygame.joystick.get_count()
+        if num_players < 1 or num_players > len(KEY_MAPS) + num_joysticks:
+            pygame.quit()
+            raise ValueError("Cannot host {} players with {} key maps and {} joysticks".format(
+                num_players, len(KEY_MAPS), num_joysticks))
+
+        self.clock = pygame.time.Clock()
+        self.games = []
+        self.routes = {}  # (device, code) -> Game
+        self.hat_values = {}  # joystick index -> last hat value
+        self.joysticks = []  # keep a reference to each opened joystick so it keeps sending events
+        self.quit = False
+
+        if num_players == 1:
+            self.add_game(KEYBOARD, KEY_MAPS[0])
+            return
+
+        # split-screen: one window with a grid of board-sized viewports
+        hidden_row_offset = int(settings.hidden_row_fraction * settings.block_width)
+        board_width, board_height = view.View.get_board_size(settings.num_rows + 2, settings.num_cols,
+                                                             settings.block_width, hidden_row_offset)
+        num_board_cols = min(num_players, settings.boards_per_row)
+        num_board_rows = (num_players - 1) // settings.boards_per_row + 1
+        window_size = (num_board_cols * (board_width + settings.board_spacing) - settings.board_spacing,
+                       num_board_rows * (board_height + settings.board_spacing) - settings.board_spacing)
+        screen = pygame.display.set_mode(window_size)
+        screen.fill(view.Colors.white)
+        pygame.display.set_caption("Tetris")
+        sprite_cache = view.SpriteCache(settings.num_rows + 2, settings.num_cols,
+                                        settings.block_width, hidden_row_offset)
+
+        for i in range(num_players):
+            if i < len(KEY_MAPS):
+                device, controls = KEYBOARD, KEY_MAPS[i]
+            else:
+                joystick_index = i - len(KEY_MAPS)
+                joystick = pygame.joystick.Joystick(joystick_index)
+                joystick.init()
+                self.joysticks.append(joystick)
+                device, controls = joystick_index, JOYSTICK_BUTTON_MAP
+            x = (i % settings.boards_per_row) * (board_width + settings.board_spacing)
+            y = (i // settings.boards_per_row) * (board_height + settings.board_spacing)
+            self.add_game(device, controls, screen.subsurface((x, y, board_width, board_height)), sprite_cache)
+
+    def add_game(self, device, controls, screen=None, sprite_cache=None):
+        """
+        Create a Game and route its device's key or button codes to it
+        """
+        game = Game(device, controls, screen, sprite_cache)
+        self.games.append(game)
+        for code in controls:
+            self.routes[(device, code)] = game
+
     def run(self):
         """
-        Run the game through a main loop. Each iteration of the loop corresponds to one frame (60 frames per second)
+        Run the games through a main loop. Each iteration of the loop corresponds to one frame (60 frames per second)
         A piece can move at most once per frame. However, the number of cells the piece moves
         depends on current state of input and speed settings
         """
-        self.game_state = GameState.running
-        while self.game_state != GameState.quit:  # run until a quit event
-            if self.game_state == GameState.reset:
-                self.reset()
+        for game in self.games:
+            game.game_state = GameState.running
+        while not self.quit:  # run until a quit event
             self.process_frame()
         pygame.quit()
 
     def process_frame(self):
         """
-        Process events, process movement, update the display and then step forward one frame
+        Process events, process movement for every game, update the display and then step forward one frame
         """
-        try:
-            self.process_events()
-            if self.game_state == GameState.running:
-                self.engine.step_one_frame()
-        except engine.GameOverException:  # TODO: remove
-            self.game_state = GameState.game_over
+        self.process_events()
+        for game in self.games:
+            game.step_one_frame()
         self.update_display()
         self.clock.tick(60)  # wait for frame end (at 60 fps)
 
     def process_events(self):
         """
-        Process relevant PyGame events (key inputs and quit request)
+        Process relevant PyGame events (key, joystick button and hat inputs, and quit request)
         """
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                self.game_state = GameState.quit
+                self.quit = True
             elif event.type == pygame.KEYDOWN:
-                self.process_keydown(event.key)
+                self.press(KEYBOARD, event.key)
             elif event.type == pygame.KEYUP:
-                self.input_manager.keyup(event.key)
+                self.release(KEYBOARD, event.key)
+            elif event.type == pygame.JOYBUTTONDOWN:
+                self.press(event.joy, event.button)
+            elif event.type == pygame.JOYBUTTONUP:
+                self.release(event.joy, event.button)
+            elif event.type == pygame.JOYHATMOTION and event.hat == 0:
+                self.process_hat_motion(event.joy, event.value)
 
-    def process_keydown(self, key):
+    def press(self, device, code):
         """
-        Process keydown event
-        Pause/resume, and reset are handled directly
-        Movement related events are sent to input_manager
-        The engine is called for rotations or hard drop, if the game is not paused
+        Route a key or button press to the game it is mapped to
         """
-        if key in [pygame.K_RETURN, pygame.K_KP_ENTER]:
-            if self.game_state == GameState.game_over:
-                self.game_state = GameState.reset
-
-        elif key == pygame.K_p:
+        game = self.routes.get((device, code))
+        if game is None:
+            return
+        action = game.controls[code]
+        if action == Action.pause:
             self.toggle_pause()
+        else:
+            game.press(action)
 
-        elif key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN]:
-            self.input_manager.keydown(key)  # forward movement events
+    def release(self, device, code):
+        game = self.routes.get((device, code))
+        if game is not None:
+            game.release(game.controls[code])
 
-        # only handle following events if game is not paused
-        if self.game_state != GameState.running:
+    def process_hat_motion(self, joy, value):
+        """
+        Translate a change of hat position into releases and presses of the movement actions
+        """
+        game = next((game for game in self.games if game.device == joy), None)
+        if game is None:
             return
-
-        if key == pygame.K_SPACE:
-            self.engine.hard_drop()
-
-        elif key in [pygame.K_UP, pygame.K_x]:
-            self.engine.rotate_right()
-        elif key == pygame.K_z:
-            self.engine.rotate_left()
+        (old_x, old_y), (x, y) = self.hat_values.get(joy, (0, 0)), value
+        self.hat_values[joy] = value
+        for action, was_pressed, is_pressed in [(Action.left, old_x == -1, x == -1),
+                                                (Action.right, old_x == 1, x == 1),
+                                                (Action.down, old_y == -1, y == -1)]:
+            if was_pressed and not is_pressed:
+                game.release(action)
+            elif is_pressed and not was_pressed:
+                game.press(action)
 
     def toggle_pause(self):
         """
-        Toggle game state between paused/running.
-        If the game state is not paused or running (e.g. game over), then do nothing
+        Toggle the state of all games between paused/running.
+        Games that are not paused or running (e.g. game over) are left as they are
         """
-        if self.game_state == GameState.paused:
-            self.game_state = GameState.running
-        elif self.game_state == GameState.running:
-            self.game_state = GameState.paused
+        if any(game.game_state == GameState.running for game in self.games):
+            old_state, new_state = GameState.running, GameState.paused
+        else:
+            old_state, new_state = GameState.paused, GameState.running
+        for game in self.games:
+            if game.game_state == old_state:
+                game.game_state = new_state
 
     def update_display(self):
         """
-        Draw all elements of the game.
+        Draw all games, then update the window once.
         """
-        self.view.draw_board()
-        if self.game_state == GameState.game_over:
-            self.view.display_game_over_dialog()
-        if self.game_state == GameState.paused:
-            self.view.display_pause_dialog()
+        for game in self.games:
+            game.update_display()
         pygame.display.flip()
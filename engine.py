@@ -176,6 +176,7 @@ class PhysicsEngine:
         Lock current piece at its current board position and get a new piece
         Raises GameOver exception
         """
+        self.board.lock_blocks(self.controller.piece.blocks)
         self.board.clear_full_rows()
         if self.board.is_game_over():
             raise GameOverException
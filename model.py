@@ -60,16 +60,209 @@ class Piece:
                     yield r, c
 
 
+class BoardMetrics:
+    """
+    Analysis metrics of a Board's locked blocks, kept up to date as cells are locked, emptied or rows are cleared
+    Each update only looks at the affected cells, columns and rows, so every metric can be read in O(1)
+    The current piece is not part of the metrics until the Board locks it. Evaluators can try a placement
+    with set_cell(r, c, True) and undo it with set_cell(r, c, False)
+
+    column_heights: height of the topmost block of each column above the floor
+    holes: empty cells with a block somewhere above them in the same column
+    covered_cells: blocks with at least one hole below them in the same column
+    well_depths: how far each column lies below the lower of its neighbours (walls count as infinitely high)
+    row_transitions, column_transitions: filled/empty changes between adjacent cells,
+        where the walls and floor count as filled
+    bumpiness: sum of the absolute height differences between adjacent columns
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.reset()
+
+    def reset(self):
+        num_rows, num_cols = self.board.num_rows, self.board.num_cols
+        self.locked = [[False for _ in range(num_cols)] for _ in range(num_rows)]
+        self.column_heights = [0] * num_cols
+        self.column_counts = [0] * num_cols  # number of blocks in each column
+        self.column_holes = [0] * num_cols
+        self.column_covered_cells = [0] * num_cols
+        self.lowest_holes = [None] * num_cols  # row index of the bottommost hole in each column
+        self.well_depths = [0] * num_cols
+        self.holes = 0
+        self.covered_cells = 0
+        self.row_transitions = 2 * num_rows  # each empty row has a transition next to each wall
+        self.column_transitions = num_cols  # each empty column has a transition to the floor
+        self.bumpiness = 0
+        for c in range(num_cols):
+            self.update_well_depth(c)
+
+    def as_dict(self):
+        """
+        Return a copy of all metrics, e.g. for exporting
+        """
+        return {'column_heights': list(self.column_heights),
+                'holes': self.holes,
+                'covered_cells': self.covered_cells,
+                'well_depths': list(self.well_depths),
+                'row_transitions': self.row_transitions,
+                'column_transitions': self.column_transitions,
+                'bumpiness': self.bumpiness}
+
+    def is_filled(self, r, c):
+        """
+        Return True if (r, c) holds a locked block or lies in a wall or the floor. Cells above the grid are empty
+        """
+        if r >= self.board.num_rows or c < 0 or c >= self.board.num_cols:
+            return True
+        if r < 0:
+            return False
+        return self.locked[r][c]
+
+    def set_cell(self, r, c, filled):
+        """
+        Mark the cell (r, c) as holding a locked block or as empty, and update the metrics
+        """
+        if self.locked[r][c] == filled:
+            return
+        self.locked[r][c] = filled
+
+        # only the pairs containing this cell can change their transition
+        for nr, nc in [(r, c - 1), (r, c + 1)]:
+            self.row_transitions += 1 if self.is_filled(nr, nc) != filled else -1
+        for nr, nc in [(r - 1, c), (r + 1, c)]:
+            if nr >= 0:  # the top edge is not a transition
+                self.column_transitions += 1 if self.is_filled(nr, nc) != filled else -1
+
+        num_rows = self.board.num_rows
+        old_height = self.column_heights[c]
+        top = num_rows - old_height  # row index of the topmost block, num_rows for an empty column
+        lowest_hole = self.lowest_holes[c]
+        if filled:
+            self.column_counts[c] += 1
+            if r < top:
+                # new topmost block, any gap below it becomes holes
+                self.column_heights[c] = num_rows - r
+                if lowest_hole is None and r < top - 1:
+                    lowest_hole = top - 1
+            elif r == lowest_hole:
+                # filled the bottommost hole, look for the next one above it
+                lowest_hole = None
+                for i in range(r - 1, top, -1):
+                    if not self.locked[i][c]:
+                        lowest_hole = i
+                        break
+        else:
+            self.column_counts[c] -= 1
+            if r == top:
+                # removed the topmost block, find the next one below it
+                new_top = r + 1
+                while new_top < num_rows and not self.locked[new_top][c]:
+                    new_top += 1
+                self.column_heights[c] = num_rows - new_top
+                if lowest_hole is not None and lowest_hole < new_top:
+                    lowest_hole = None
+            elif lowest_hole is None or r > lowest_hole:
+                lowest_hole = r
+        self.update_column(c, lowest_hole)
+
+        if self.column_heights[c] != old_height:
+            self.update_height(c, old_height)
+
+    def clear_row(self, r):
+        """
+        Update metrics for clearing the row r, which must be full of locked blocks, and moving the rows above it
+        down. Like Board.clear_full_rows, blocks in the top row are dropped rather than moved down
+        """
+        if r > 0:
+            for c in range(self.board.num_cols):
+                self.set_cell(0, c, False)
+
+        # a full row has no transitions, it is replaced by an empty row at the top
+        self.row_transitions += 2
+
+        for c in range(self.board.num_cols):
+            # the cleared cell's pairs are replaced by the pair of its neighbours,
+            # and the new empty top cell pairs with the topmost remaining cell
+            above, below = self.is_filled(r - 1, c), self.is_filled(r + 1, c)
+            if r > 0:
+                self.column_transitions += (above != below) - (not above) - (not below) + self.is_filled(0, c)
+            else:
+                self.column_transitions += below - (not below)
+
+            self.column_counts[c] -= 1
+            lowest_hole = self.lowest_holes[c]
+            if self.board.num_rows - self.column_heights[c] < r:
+                # the blocks above the cleared row move down with the holes between them
+                self.column_heights[c] -= 1
+                if lowest_hole is not None and lowest_hole < r:
+                    lowest_hole += 1
+            else:
+                # the cleared block was the topmost one, the column now starts at the next block below it
+                new_top = r + 1
+                while new_top < self.board.num_rows and not self.locked[new_top][c]:
+                    new_top += 1
+                self.column_heights[c] = self.board.num_rows - new_top
+                if lowest_hole is not None and lowest_hole < new_top:
+                    lowest_hole = None
+            self.update_column(c, lowest_hole)
+
+        # heights may change by different amounts, so update bumpiness and wells across the whole surface
+        heights = self.column_heights
+        self.bumpiness = sum(abs(heights[c] - heights[c + 1]) for c in range(len(heights) - 1))
+        for c in range(len(heights)):
+            self.update_well_depth(c)
+
+        del self.locked[r]
+        self.locked.insert(0, [False for _ in range(self.board.num_cols)])
+
+    def update_column(self, c, lowest_hole):
+        """
+        Set the bottommost hole of column c, then update its hole and covered cell counts and the totals
+        """
+        self.lowest_holes[c] = lowest_hole
+        holes = self.column_heights[c] - self.column_counts[c]
+        if lowest_hole is None:
+            covered_cells = 0
+        else:
+            # every cell below the bottommost hole is filled
+            covered_cells = self.column_counts[c] - (self.board.num_rows - 1 - lowest_hole)
+        self.holes += holes - self.column_holes[c]
+        self.covered_cells += covered_cells - self.column_covered_cells[c]
+        self.column_holes[c] = holes
+        self.column_covered_cells[c] = covered_cells
+
+    def update_height(self, c, old_height):
+        """
+        Update bumpiness and the well depths of column c and its neighbours after the height of c changed
+        """
+        heights = self.column_heights
+        for n in [c - 1, c + 1]:
+            if 0 <= n < len(heights):
+                self.bumpiness += abs(heights[c] - heights[n]) - abs(old_height - heights[n])
+        for n in [c - 1, c, c + 1]:
+            if 0 <= n < len(heights):
+                self.update_well_depth(n)
+
+    def update_well_depth(self, c):
+        heights = self.column_heights
+        neighbours = [heights[n] for n in [c - 1, c + 1] if 0 <= n < len(heights)]
+        # a wall is as high as the grid
+        self.well_depths[c] = max(0, min(neighbours, default=self.board.num_rows) - heights[c])
+
+
 class Board:
 
     def __init__(self, num_rows, num_cols):
         self.num_rows = num_rows
         self.num_cols = num_cols
         self.grid = []
+        self.metrics = BoardMetrics(self)
         self.reset()
 
     def reset(self):
         self.grid = [[None for _ in range(self.num_cols)] for _ in range(self.num_rows)]
+        self.metrics.reset()
 
     def is_game_over(self):
         """
@@ -102,6 +295,13 @@ class Board:
         for block in blocks:
             self.grid[block.r][block.c] = block
 
+    def lock_blocks(self, blocks):
+        """
+        Add blocks that have come to rest in the grid to the metrics
+        """
+        for block in blocks:
+            self.metrics.set_cell(block.r, block.c, True)
+
     def attempt_update_blocks(self, blocks, new_coords):
         """
         Attempt to update the co-ordinates of blocks to new_coords
@@ -133,6 +333,7 @@ class Board:
                     break  # move to next row
             if not has_empty_cell:
                 # full row; clear current row
+                self.metrics.clear_row(i)
                 self.grid[i] = [None for _ in range(len(row))]
                 # move each row above the cleared one down, starting from the bottommost row
                 for j in range(i, 0, -1):
@@ -145,15 +346,9 @@ class Board:
 
     def draw(self, view):
         """
-        Draw the grid onto the given View.
+        Draw the blocks in the grid onto the given View.
+        Grid lines are part of the View's static background.
         """
-        # draw grid lines
-        for r in range(self.num_rows):
-            view.draw_horizontal_line(r)
-        for c in range(self.num_cols + 1):
-            view.draw_vertical_line(c)
-
-        # draw each block
         for row in self.grid:
             for block in row:
                 if block is not None:
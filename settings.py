@@ -11,3 +11,10 @@ auto_repeat_initial_delay = 10  # frames to wait after an initial left/right mov
 auto_repeat_delay = 4  # frames to wait before each left/right step on autorepeat (3 frames == 20 Hz at 60fps)
 soft_drop_delay = 3  # frames to wait before each down step on soft drop (3 frames == 1/3 G at 60fps)
 lock_delay = 30  # frames to wait before locking a piece after downward collision
+
+# split-screen settings, used when hosting more than one game in a window
+num_players = 1
+boards_per_row = 4
+board_spacing = 20  # in pixels
+
+show_metrics = False  # display the board analysis metrics (heights, holes, wells, ...) over the grid
@@ -13,6 +13,11 @@ Down: move down / soft drop
 Space: hard drop
 P: pause / unpause
 
+Local multiplayer: pass the number of players as an argument, e.g. `tetris.py 2`
+All boards are shown side by side in one window. Player 2 uses
+A/D/S to move, Q/W/E to rotate, Left Shift to hard drop and R to restart,
+further players use a joystick each
+
 This clone aims to replicate the Tetris Guideline including Random Generator and Super Rotation System (SRS)
 http://tetris.wikia.com/wiki/Tetris_Guideline
 
@@ -26,8 +31,18 @@ Currently missing features:
 
 """
 
+import sys
+
+import settings
 from app import App
 
 if __name__ == '__main__':
-    app = App()
+    usage = "usage: tetris.py [num_players]"
+    if len(sys.argv) > 2:
+        sys.exit(usage)
+    try:
+        num_players = int(sys.argv[1]) if len(sys.argv) > 1 else settings.num_players
+        app = App(num_players)
+    except ValueError as e:
+        sys.exit("{}\n{}".format(usage, e))
     app.run()
@@ -18,44 +18,113 @@ class Colors:
     yellow = (255, 255, 0)
 
 
+class SpriteCache:
+    """
+    Pre-rendered static surfaces for drawing boards of a given size
+    The grid background and one sprite per block color are rendered once and blitted every frame,
+    so several views of the same size can share a single cache
+    """
+
+    def __init__(self, num_rows, num_cols, block_width, hidden_row_offset):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.block_width = block_width
+        self.hidden_row_offset = hidden_row_offset
+        self.background = self.render_background()
+        self.block_sprites = {}
+
+    def render_background(self):
+        """
+        Render the empty grid: a white fill with light gray grid lines
+        """
+        size = View.get_board_size(self.num_rows, self.num_cols, self.block_width, self.hidden_row_offset)
+        background = pygame.Surface(size)
+        background.fill(Colors.white)
+        for r in range(self.num_rows):
+            x = (r - 2) * self.block_width + self.hidden_row_offset
+            pygame.draw.line(background, Colors.lightgray, (0, x), (self.num_cols * self.block_width, x))
+        for c in range(self.num_cols + 1):
+            y = c * self.block_width
+            pygame.draw.line(background, Colors.lightgray, (y, 0), (y, self.num_rows * self.block_width))
+        return background
+
+    def get_block_sprite(self, color):
+        """
+        Return the sprite for a block of the given color, rendering it on first use
+        The sprite is one pixel wider than a cell so the black border covers the neighbouring grid lines
+        """
+        sprite = self.block_sprites.get(color)
+        if sprite is None:
+            width = self.block_width
+            sprite = pygame.Surface((width + 1, width + 1))
+            sprite.fill(color)
+            pygame.draw.lines(sprite, Colors.black, True,
+                              [(0, 0), (0, width), (width, width), (width, 0)], 1)
+            self.block_sprites[color] = sprite
+        return sprite
+
+
 class View:
     """
     Class for handling display of all elements to the PyGame screen
+    If no screen is given, a window sized to fit the board is created. Otherwise the view draws onto the
+    given surface, e.g. a subsurface of a shared window in split-screen mode
     """
 
-    def __init__(self, board, block_width, hidden_row_fraction):
+    def __init__(self, board, block_width, hidden_row_fraction, screen=None, sprite_cache=None):
         self.board = board
+        self.metrics_font = None
 
         self.block_width = block_width
         self.hidden_row_offset = int(hidden_row_fraction * self.block_width)
 
+        self.window_size = self.get_board_size(self.board.num_rows, self.board.num_cols,
+                                               self.block_width, self.hidden_row_offset)
+        if screen is None:
+            screen = pygame.display.set_mode(self.window_size)
+            pygame.display.set_caption("Tetris")
+        self.screen = screen
+
+        if sprite_cache is None:
+            sprite_cache = SpriteCache(self.board.num_rows, self.board.num_cols,
+                                       self.block_width, self.hidden_row_offset)
+        self.sprite_cache = sprite_cache
+
+    @staticmethod
+    def get_board_size(num_rows, num_cols, block_width, hidden_row_offset):
+        """
+        Return the (width, height) in pixels needed to display a board
+        """
         # the +1 offset is to needed to make grid lines appear on the bottom and right sides
-        self.window_size = (self.board.num_cols * self.block_width + 1,
-                            (self.board.num_rows - 2) * self.block_width + self.hidden_row_offset + 1)
-        self.screen = pygame.display.set_mode(self.window_size)
-        pygame.display.set_caption("Tetris")
+        return (num_cols * block_width + 1,
+                (num_rows - 2) * block_width + hidden_row_offset + 1)
 
     def draw_board(self):
-        self.screen.fill(Colors.white)
+        self.screen.blit(self.sprite_cache.background, (0, 0))
         self.board.draw(self)
 
-    def draw_horizontal_line(self, r):
-        x = (r - 2) * self.block_width + self.hidden_row_offset
-        pygame.draw.line(self.screen, Colors.lightgray, (0, x), (self.board.num_cols * self.block_width, x))
-
-    def draw_vertical_line(self, c):
-        y = c * self.block_width
-        pygame.draw.line(self.screen, Colors.lightgray, (y, 0), (y, self.board.num_rows * self.block_width))
-
     def draw_block(self, block):
-        width = self.block_width
-        x = (block.r - 2) * width + self.hidden_row_offset
-        y = block.c * width
-        pygame.draw.rect(self.screen, block.color,
-                         [y, x, width, width])
-        pygame.draw.lines(self.screen, Colors.black, True,
-                          [(y, x), (y, x + width),
-                           (y + width, x + width), (y + width, x)], 1)
+        x = (block.r - 2) * self.block_width + self.hidden_row_offset
+        y = block.c * self.block_width
+        self.screen.blit(self.sprite_cache.get_block_sprite(block.color), (y, x))
+
+    def display_metrics_overlay(self):
+        """
+        Display the board's analysis metrics as small text in the top left corner of the grid
+        """
+        if self.metrics_font is None:
+            self.metrics_font = pygame.font.SysFont('Verdana', 10)
+        metrics = self.board.metrics
+        lines = ["Heights: " + " ".join(str(height) for height in metrics.column_heights),
+                 "Wells: " + " ".join(str(depth) for depth in metrics.well_depths),
+                 "Holes: {}  Covered: {}".format(metrics.holes, metrics.covered_cells),
+                 "Transitions: {} rows, {} cols".format(metrics.row_transitions, metrics.column_transitions),
+                 "Bumpiness: {}".format(metrics.bumpiness)]
+        y = self.hidden_row_offset + 2
+        for line in lines:
+            text = self.metrics_font.render(line, True, Colors.black)
+            self.screen.blit(text, (4, y))
+            y += text.get_height()
 
     def display_dialog(self, message, message2=None):
         """
@@ -101,8 +170,8 @@ class View:
         if message2 is not None:
             self.screen.blit(text2, text2_pos)
 
-    def display_game_over_dialog(self):
-        self.display_dialog("GAME OVER", "Press Enter to restart")
+    def display_game_over_dialog(self, restart_key="Enter"):
+        self.display_dialog("GAME OVER", "Press {} to restart".format(restart_key))
 
-    def display_pause_dialog(self):
-        self.display_dialog("PAUSED", "Press P to resume")
+    def display_pause_dialog(self, pause_key="P"):
+        self.display_dialog("PAUSED", "Press {} to resume".format(pause_key))